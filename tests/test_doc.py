@@ -0,0 +1,100 @@
+""" Tests for the wuw.be.doc module.
+"""
+import os.path
+
+import docx
+import pytest
+
+from docx.oxml import parse_xml
+from docx.oxml.ns import nsdecls
+from docx.shared import Inches
+
+from wuw.be.doc import iter_paragraph_texts
+
+DEMO_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'test_docs')
+
+# Namespaces of text boxes in the legacy VML format. Python-docx doesn't know these prefixes.
+_EXTRA_NSDECLS = ('xmlns:mc="http://schemas.openxmlformats.org/markup-compatibility/2006" '
+                  'xmlns:v="urn:schemas-microsoft-com:vml"')
+
+# Paragraph contents with runs that python-docx does and doesn't include in Paragraph.text.
+_PARAGRAPH_XML = [
+    # Runs in a hyperlink, an insertion, an inline content control and a simple field.
+    '<w:r><w:t>A</w:t></w:r>'
+    '<w:hyperlink r:id="rId99"><w:r><w:t>LINK</w:t></w:r></w:hyperlink>'
+    '<w:ins w:id="1" w:author="x"><w:r><w:t>INS</w:t></w:r></w:ins>'
+    '<w:sdt><w:sdtContent><w:r><w:t>SDT</w:t></w:r></w:sdtContent></w:sdt>'
+    '<w:r><w:tab/><w:t>B</w:t><w:br/><w:cr/><w:br w:type="page"/><w:noBreakHyphen/></w:r>'
+    '<w:fldSimple w:instr="PAGE"><w:r><w:t>1</w:t></w:r></w:fldSimple>',
+
+    # A text box, of which the runs are nested in a drawing inside a run.
+    '<w:r><w:t xml:space="preserve">Before </w:t></w:r>'
+    '<w:r><mc:AlternateContent><mc:Fallback><w:pict><v:shape><v:textbox><w:txbxContent>'
+    '<w:p><w:r><w:t>BOX</w:t></w:r></w:p>'
+    '</w:txbxContent></v:textbox></v:shape></w:pict></mc:Fallback></mc:AlternateContent></w:r>'
+    '<w:r><w:t xml:space="preserve"> after</w:t></w:r>',
+
+    # Empty paragraph
+    '',
+]
+
+
+@pytest.fixture
+def tricky_docx(tmp_path) -> str:
+    """ Returns the path of a document with paragraphs that are hard to convert to text.
+    """
+    document = docx.Document()
+    document.add_paragraph('Plain paragraph')
+    for xml in _PARAGRAPH_XML:
+        p = parse_xml(f'<w:p {nsdecls("w", "r")} {_EXTRA_NSDECLS}>{xml}</w:p>')
+        document.element.body.insert(len(document.element.body) - 1, p)  # Before w:sectPr
+    table = document.add_table(rows=1, cols=1)
+    table.cell(0, 0).text = 'In table'
+    document.add_paragraph('Last paragraph')
+
+    file_name = str(tmp_path / 'tricky.docx')
+    document.save(file_name)
+    return file_name
+
+
+def _assert_same_texts(file_name: str):
+    """ Asserts that iter_paragraph_texts gives the same texts as python-docx.
+    """
+    expected = [paragraph.text for paragraph in docx.Document(file_name).paragraphs]
+    assert list(iter_paragraph_texts(file_name)) == expected
+
+
+def test_tricky_paragraph_texts(tricky_docx):
+    _assert_same_texts(tricky_docx)
+
+
+@pytest.fixture
+def demo_docx(tmp_path) -> str:
+    """ Returns the path of a document like the one that test_docs/demo.py creates.
+    """
+    document = docx.Document()
+    document.add_heading('Document Title', 0)
+
+    p = document.add_paragraph('A plain paragraph having some ')
+    p.add_run('bold').bold = True
+    p.add_run(' and some ')
+    p.add_run('italic.').italic = True
+
+    document.add_heading('Heading, level 1', level=1)
+    document.add_paragraph('Intense quote', style='Intense Quote')
+    document.add_paragraph('first item in unordered list', style='List Bullet')
+    document.add_paragraph('first item in ordered list', style='List Number')
+    document.add_picture(os.path.join(DEMO_DIR, 'penguins.jpg'), width=Inches(1.25))
+
+    table = document.add_table(rows=1, cols=3)
+    for cell, text in zip(table.rows[0].cells, ('Qty', 'Id', 'Desc')):
+        cell.text = text
+    document.add_page_break()
+
+    file_name = str(tmp_path / 'demo.docx')
+    document.save(file_name)
+    return file_name
+
+
+def test_demo_paragraph_texts(demo_docx):
+    _assert_same_texts(demo_docx)
@@ -1,25 +1,123 @@
 """ PyDocX related stuf.
 """
+import functools
 import logging
 import os.path
+import zipfile
 
-from io import BytesIO
+from typing import Iterator
 
 from docx import Document as createDocument
 from docx.document import Document
+from lxml import etree
 
 logger = logging.getLogger(__name__)
 
+# Large read buffer so that zlib is fed with big chunks when inflating the zip parts.
+READ_BUFFER_SIZE = 1 << 20  # 1 MiB
+
+# Maximum number of parsed documents that are kept in memory.
+MAX_CACHED_DOCUMENTS = 8
+
+# Tags of the WordprocessingML elements that are needed to extract the paragraph texts.
+_W_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_W_BODY = _W_NS + "body"
+_W_P = _W_NS + "p"
+_W_R = _W_NS + "r"
+_W_HYPERLINK = _W_NS + "hyperlink"
+_W_T = _W_NS + "t"
+_W_BR = _W_NS + "br"
+_W_BR_TYPE = _W_NS + "type"
+
+# Text equivalents of the run content elements (the same as used by python-docx).
+_RUN_CONTENT_TEXTS = {
+    _W_NS + "tab": '\t',
+    _W_NS + "ptab": '\t',
+    _W_NS + "cr": '\n',
+    _W_NS + "noBreakHyphen": '-',
+}
+
+
 def read_document(file_name: str) -> Document:
     """ Opens the file read-only as a Python-docx document.
 
         It seems that you can't open a Word document on the OneDrive readonly if it is also opened
         in Word itself. When the document is saved only locally, you can.
+
+        Parsed documents are cached. The modification time and size of the file are part of the
+        cache key, so a file that has changed on disk is read again.
+    """
+    assert os.path.exists(file_name), f"File does not exist: {file_name}"
+    stat = os.stat(file_name)
+    return _read_document_cached(file_name, stat.st_mtime_ns, stat.st_size)
+
+
+def clear_cache() -> None:
+    """ Removes all parsed documents from the cache so that they will be read from disk again.
+    """
+    _read_document_cached.cache_clear()
+
+
+@functools.lru_cache(maxsize=MAX_CACHED_DOCUMENTS)
+def _read_document_cached(file_name: str, _mtime_ns: int, _size: int) -> Document:
+    """ Reads the document from disk. The mtime and size parameters are only used as cache key.
+    """
+    logger.info("Opening %s", file_name)
+    # Pass the open file instead of a copy in memory, so that the zip parts are decompressed
+    # directly from disk. Python-docx reads all parts while loading so the file can be closed
+    # as soon as the document has been created.
+    with open(file_name, 'rb', buffering=READ_BUFFER_SIZE) as file:
+        document = createDocument(file)
+    return document
+
+
+def iter_paragraph_texts(file_name: str) -> Iterator[str]:
+    """ Yields the text of the paragraphs in the body of a Word document.
+
+        Much faster and lighter than read_document when only the texts are needed. The
+        document.xml part is parsed incrementally and processed elements are removed from the
+        tree, so memory use doesn't grow with the size of the document.
+
+        The texts are the same as Paragraph.text of python-docx: only the runs that are direct
+        children of the paragraph, or of a hyperlink in the paragraph, are included. Tabs become
+        '\t' and line breaks become '\n'. Paragraphs inside tables are skipped, just as in
+        document.paragraphs.
     """
-    logger.info(f"Opening {file_name}")
     assert os.path.exists(file_name), f"File does not exist: {file_name}"
-    with open(file_name, 'rb') as file:
-        source_stream = BytesIO(file.read())
-    document = createDocument(source_stream)
-    source_stream.close()
-    return document
\ No newline at end of file
+    with zipfile.ZipFile(file_name) as zipFile, zipFile.open('word/document.xml') as xmlFile:
+        for _event, elem in etree.iterparse(xmlFile, tag=_W_P):
+            parent = elem.getparent()
+            if parent is None or parent.tag != _W_BODY:
+                continue  # Removed later, together with its top-level ancestor.
+
+            parts = []
+            for run in _iter_paragraph_runs(elem):
+                for child in run:
+                    tag = child.tag
+                    if tag == _W_T:
+                        parts.append(child.text or '')
+                    elif tag == _W_BR:
+                        # Page and column breaks have no text equivalent.
+                        if child.get(_W_BR_TYPE, 'textWrapping') == 'textWrapping':
+                            parts.append('\n')
+                    elif tag in _RUN_CONTENT_TEXTS:
+                        parts.append(_RUN_CONTENT_TEXTS[tag])
+            yield ''.join(parts)
+
+            # Free the paragraph and all its (already processed) predecessors.
+            elem.clear()
+            while elem.getprevious() is not None:
+                del parent[0]
+
+
+def _iter_paragraph_runs(paragraph: etree._Element) -> Iterator[etree._Element]:
+    """ Yields the runs of which python-docx includes the text in Paragraph.text.
+
+        These are the w:r children of the paragraph and the w:r children of its hyperlinks.
+        Runs in e.g. insertions, content controls, fields and text boxes are skipped.
+    """
+    for child in paragraph:
+        if child.tag == _W_R:
+            yield child
+        elif child.tag == _W_HYPERLINK:
+            yield from child.iterchildren(_W_R)
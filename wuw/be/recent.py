@@ -0,0 +1,12 @@
+""" Recently opened files.
+"""
+from typing import NamedTuple
+
+
+class RecentFile(NamedTuple):
+    """ A recently opened file and the time it was opened.
+
+        The field order matches the [timeStamp, fileName] pairs in the settings file.
+    """
+    timeStamp: float
+    fileName: str
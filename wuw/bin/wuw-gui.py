@@ -5,11 +5,10 @@ import logging
 import os.path
 import sys
 
-from wuw.be.doc import read_document
+# Only light-weight imports here. PySide6 and python-docx are imported where they are needed so
+# that e.g. the --version option doesn't pay for importing them.
 from wuw.be.info import PROJECT_NAME, VERSION
-from wuw.gui.mainapp import MainApp, qApplicationSingleton
-from wuw.gui.misc import safeSetApplicationStyleSheet, safeSetApplicationQtStyle
-from wuw.utils.dirs import resource_directory
+from wuw.utils.dirs import normAbsPath
 
 logger = logging.getLogger()
 
@@ -18,6 +17,7 @@ def browse_structure(file_name:str) -> None:
     """ Uses the object browser to brawse the document.
     """
     from objbrowser import browse
+    from wuw.be.doc import read_document
     document = read_document(file_name)
     browse({'document': document})
 
@@ -25,6 +25,10 @@ def browse_structure(file_name:str) -> None:
 def startGui(args: argparse.Namespace):
     """ Creates the main app and start the Qt GUI
     """
+    from wuw.gui.mainapp import MainApp, qApplicationSingleton
+    from wuw.gui.misc import safeSetApplicationStyleSheet, safeSetApplicationQtStyle
+    from wuw.utils.dirs import resource_directory
+
     # Apparently, in Qt6 you need to create the QApplication before you can create a widget.
     _qApp = qApplicationSingleton()
 
@@ -37,15 +41,17 @@ def startGui(args: argparse.Namespace):
     else:
         styleSheet = os.path.abspath(styleSheet)
 
+    fileNames = [normAbsPath(fileName) for fileName in args.fileNames]
+
     mainApp = MainApp(settingsFile=None)
-    mainApp.loadSettings(fileNames=args.fileNames)
+    mainApp.loadSettings(fileNames=fileNames)
 
     safeSetApplicationQtStyle(qtStyle)
     safeSetApplicationStyleSheet(styleSheet)
 
     logger.debug("Starting mainApp")
     exitCode = mainApp.execute()
-    logger.info(f"{PROJECT_NAME} finished with exit code: {exitCode}")
+    logger.info("%s finished with exit code: %s", PROJECT_NAME, exitCode)
     sys.exit(exitCode)
 
 
@@ -90,7 +96,10 @@ def main():
         sys.exit(0)
 
     if args.browse:
-        file_name = os.path.normpath(os.path.abspath(args.file_name))
+        if not args.fileNames:
+            print("Please give a file name to browse as command line argument.", file=sys.stderr)
+            sys.exit(2)
+        file_name = normAbsPath(args.fileNames[0])
         browse_structure(file_name)
         sys.exit(0)
 
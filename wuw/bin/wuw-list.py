@@ -2,36 +2,24 @@
 """
 import argparse
 import logging
-import os.path
 import sys
-from io import BytesIO
 
-from docx import Document
 from wuw.be.info import VERSION
+from wuw.utils.dirs import normAbsPath
 
 logger = logging.getLogger()
 
-def read_document(file_name: str) -> Document:
-    """ Opens the file read-only as a Python-docx document.
-
-        It seems that you can't open a Word document on the OneDrive readonly if it is also opened
-        in Word itself. When the document is saved only locally, you can.
-    """
-    logger.info(f"Opening {file_name}")
-    assert os.path.exists(file_name), f"File does not exist: {file_name}"
-    with open(file_name, 'rb') as file:
-        source_stream = BytesIO(file.read())
-    document = Document(source_stream)
-    source_stream.close()
-    return document
-
 
 def list_structure(file_name:str) -> None:
     """ Lists the structure of a Word file.
     """
-    document = read_document(file_name)
-    for paragraph in document.paragraphs:
-        print(repr(paragraph.text))
+    from wuw.be.doc import iter_paragraph_texts  # Deferred to keep --version fast.
+
+    logger.info("Opening %s", file_name)
+    # A single writelines call lets the stdout buffer write in large chunks instead of
+    # taking the lock and (possibly) flushing for every paragraph.
+    sys.stdout.writelines(repr(text) + '\n' for text in iter_paragraph_texts(file_name))
+    sys.stdout.flush()
 
 
 
@@ -59,7 +47,7 @@ def main():
         print("Please give a file name as the command line argument.", file=sys.stderr)
         sys.exit(2)
 
-    file_name = os.path.normpath(os.path.abspath(args.file_name))
+    file_name = normAbsPath(args.file_name)
     list_structure(file_name)
 
 
@@ -27,6 +27,6 @@ class CentralWidget(QtWidgets.QWidget):
 
 
     def setDocument(self, document: Document) -> None:
-        self.tableModel.document = document
+        self.tableModel.setDocument(document)
 
 
@@ -1,11 +1,16 @@
 """ Version and other info for this program
 """
+import functools
 import json
 import logging
 import os.path
 import pprint
 import shutil
 import sys
+import threading
+import time
+
+from collections import OrderedDict
 
 
 from PySide6 import QtCore, QtGui, QtWidgets
@@ -14,6 +19,7 @@ from PySide6.QtCore import Slot, QtMsgType
 import wuw.be.info as info
 
 from wuw.be.info import DEBUGGING, EXIT_CODE_SUCCESS, KEY_PROGRAM, PROJECT_NAME, VERSION, KEY_VERSION
+from wuw.be.recent import RecentFile
 from wuw.gui.mainwindow import MainWindow
 
 from wuw.utils.dirs import normRealPath, ensureFileExists, appConfigDirectory
@@ -24,6 +30,7 @@ from wuw.utils.misc import ConfigDict
 
 logger = logging.getLogger(__name__)
 
+SETTINGS_WRITE_BUFFER_SIZE = 1 << 16  # 64 KiB
 
 
 _Q_APP = None # Keep reference to QApplication instance to prevent garbage collection
@@ -49,6 +56,38 @@ def qApplicationSingleton():
 
 
 
+@functools.lru_cache(maxsize=1)
+def _defaultSettingsFile() -> str:
+    """ Returns the path to the default settings file.
+
+        Cached because normRealPath resolves symbolic links, which requires file system access.
+    """
+    return normRealPath(os.path.join(appConfigDirectory(), 'settings.json'))
+
+
+
+@functools.lru_cache(maxsize=16)
+def _resolveSettingsPath(settingsFile: str) -> str:
+    """ Returns the path of the settings file. Relative paths are relative to the config dir.
+    """
+    return os.path.join(appConfigDirectory(), settingsFile)
+
+
+
+def _copyConfigBackup(settingsFile: str, cfgBackup: str) -> None:
+    """ Copies the settings file to the backup file. Is called in a background thread.
+
+        The version is in the backup name, so the file metadata doesn't need to be preserved.
+    """
+    try:
+        shutil.copyfile(settingsFile, cfgBackup)
+    except Exception as ex:
+        logger.error("Unable to make a backup of the settings file to %s: %s", cfgBackup, ex)
+    else:
+        logger.debug("Finished making a backup to: %s", cfgBackup)
+
+
+
 class MainApp(QtCore.QObject):
     """ The application singleton which holds global state.
     """
@@ -65,10 +104,10 @@ class MainApp(QtCore.QObject):
 
         if not settingsFile:
             settingsFile = MainApp.defaultSettingsFile()
-            logger.debug("No config file specified. Using default: {}".format(settingsFile))
+            logger.debug("No config file specified. Using default: %s", settingsFile)
 
         self._settingsFile = MainApp.userConfirmedSettingsFile(
-            settingsFile, createWithoutConfirm=MainApp.defaultSettingsFile())
+            settingsFile, createWithoutConfirm=frozenset([MainApp.defaultSettingsFile()]))
 
         if setExceptHook:
             logger.debug("Setting sys.excepthook to app-specific exception handling")
@@ -78,7 +117,9 @@ class MainApp(QtCore.QObject):
 
         self._mainWindows = []
         self._settingsSaved = False  # boolean to prevent saving settings twice
-        self._recentFiles = []    # list of recently opened files ([timeStampe, fileName] per file).
+        self._backupThread = None  # Thread that makes a backup of the settings file (if any)
+        self._windowMenusDirty = False  # True if a window menu rebuild has been scheduled
+        self._recentFiles = OrderedDict()  # fileName -> RecentFile. Oldest first.
         self._maxRecentFiles = 10  # Maximum size of recent file
 
         #self.qApplication.aboutToQuit.connect(self.aboutToQuitHandler)
@@ -110,20 +151,20 @@ class MainApp(QtCore.QObject):
     def defaultSettingsFile(cls):
         """ Returns the path to the default settings file
         """
-        return normRealPath(os.path.join(appConfigDirectory(), 'settings.json'))
+        return _defaultSettingsFile()
 
 
     @classmethod
-    def userConfirmedSettingsFile(cls, settingsFile, createWithoutConfirm=None):
+    def userConfirmedSettingsFile(cls, settingsFile, createWithoutConfirm=frozenset()):
         """ Asks the user to confirm creating the settings file if it does not exist and is not
-            in the createWithoutConfirm list.
+            in the createWithoutConfirm set.
 
             If settingsFile is a relative path it will be concatenated to the app config dir.
 
             Returns: The path of the setting file.
         """
-        settingsFile = os.path.join(appConfigDirectory(), settingsFile)
-        logger.debug("Testing if settings file exists: {}".format(settingsFile))
+        settingsFile = _resolveSettingsPath(settingsFile)
+        logger.debug("Testing if settings file exists: %s", settingsFile)
         if os.path.exists(settingsFile):
             return settingsFile
         else:
@@ -133,8 +174,7 @@ class MainApp(QtCore.QObject):
                 _app = qApplicationSingleton() # make sure QApplication exists.
                 button = QtWidgets.QMessageBox.question(
                     None, "Create settings file?",
-                    "The setting file cannot be found: {} \n\nCreate new config file?"
-                                                        .format(settingsFile))
+                    f"The setting file cannot be found: {settingsFile} \n\nCreate new config file?")
 
                 if button == QtWidgets.QMessageBox.Yes:
                     return ensureFileExists(settingsFile)
@@ -183,21 +223,22 @@ class MainApp(QtCore.QObject):
             This function must be installed with QtCore.qInstallMessageHandler.
             See https://doc.qt.io/qt-5/qtglobal.html#qInstallMessageHandler
         """
-        # Still print the message to stderr, just like Qt does by default.
-        print(msg, file=sys.stderr, flush=True)
+        # In debugging mode, still print the message to stderr, just like Qt does by default.
+        if DEBUGGING:
+            print(msg, file=sys.stderr, flush=True)
 
         if qMsgType == QtMsgType.QtDebugMsg:
-            logger.debug(msg)
+            logger.debug("%s", msg)
         elif qMsgType == QtMsgType.QtInfoMsg:
-            logger.info(msg)
+            logger.info("%s", msg)
         elif qMsgType == QtMsgType.QtWarningMsg:
-            logger.warning(msg)
+            logger.warning("%s", msg)
         elif qMsgType == QtMsgType.QtCriticalMsg:
-            logger.error(msg)
+            logger.error("%s", msg)
         elif qMsgType == QtMsgType.QtFatalMsg:
-            logger.error(msg)
+            logger.error("%s", msg)
         else:
-            logger.critical("Qt message of unknown type {}: {}".format(qMsgType, msg))
+            logger.critical("Qt message of unknown type %s: %s", qMsgType, msg)
 
 
     def _makeConfigBackup(self, cfg):
@@ -208,18 +249,35 @@ class MainApp(QtCore.QObject):
             return cfg
 
         cfgVersion = cfg.get(KEY_VERSION, '0.0.1')
+        if cfgVersion == VERSION:
+            return cfg
 
-        if cfgVersion != VERSION:
-            logger.info("Config file version {} differs from application version {}."
-                        .format(cfgVersion, VERSION))
+        logger.info("Config file version %s differs from application version %s.",
+                    cfgVersion, VERSION)
 
-            cfgBackup = "{}.v{}.backup".format(self._settingsFile, cfgVersion)
-            logger.info("Making a backup to: {}".format(os.path.abspath(cfgBackup)))
-            shutil.copy2(self._settingsFile, cfgBackup)
+        # The settings file path is already absolute (see userConfirmedSettingsFile).
+        cfgBackup = f"{self._settingsFile}.v{cfgVersion}.backup"
+        logger.info("Making a backup to: %s", cfgBackup)
 
+        # Copy in a background thread so that the startup is not blocked by disk I/O. It's not a
+        # daemon thread, so the backup is completed even if the program exits right away.
+        self._backupThread = threading.Thread(
+            target=_copyConfigBackup, args=(self._settingsFile, cfgBackup), name="config-backup")
+        self._backupThread.start()
         return cfg
 
 
+    def addToRecentFiles(self, fileName: str) -> None:
+        """ Adds the file to the recently opened files, or moves it to the end if already present.
+
+            Removes the oldest files if there are more than the maximum number of recent files.
+        """
+        self._recentFiles.pop(fileName, None)
+        self._recentFiles[fileName] = RecentFile(time.time(), fileName)
+        while len(self._recentFiles) > self._maxRecentFiles:
+            self._recentFiles.popitem(last=False)
+
+
     def marshall(self) -> ConfigDict:
         """ Returns a dictionary to save in the persistent settings
         """
@@ -228,12 +286,13 @@ class MainApp(QtCore.QObject):
         cfg[KEY_PROGRAM] = PROJECT_NAME
         cfg[KEY_VERSION] = VERSION
 
-        cfg['recent_files'] = self._recentFiles
+        # Stored as a list of [timeStamp, fileName] pairs.
+        cfg['recent_files'] = [list(recentFile) for recentFile in self._recentFiles.values()]
 
         # Save windows as a dict instead of a list to improve readability of the resulting JSON
         cfg['windows'] = {}
         for winNr, mainWindow in enumerate(self.mainWindows):
-            key = "win-{:d}".format(winNr)
+            key = f"win-{winNr:d}"
             cfg['windows'][key] = mainWindow.marshall()
 
         return cfg
@@ -243,10 +302,18 @@ class MainApp(QtCore.QObject):
         """ Initializes itself from a config dict form the persistent settings.
         """
         fileNames = [] if fileNames is None else fileNames
-        self._recentFiles = cfg.get('recent_files', [])
+        self._recentFiles = OrderedDict()
+        for item in cfg.get('recent_files', []):
+            # Skip malformed entries instead of failing at startup. Each entry should be a
+            # [timeStamp, fileName] pair.
+            if not (isinstance(item, list) and len(item) == 2 and isinstance(item[1], str)):
+                logger.warning("Ignoring invalid recent files entry: %r", item)
+                continue
+            recentFile = RecentFile(*item)
+            self._recentFiles[recentFile.fileName] = recentFile
 
         for idx, (winId, winCfg) in enumerate(cfg.get('windows', {}).items()):
-            assert winId.startswith('win-'), "Win ID doesn't start with 'win-': {}".format(winId)
+            assert winId.startswith('win-'), f"Win ID doesn't start with 'win-': {winId}"
             try:
                 fileName = fileNames[idx]
             except IndexError:
@@ -255,7 +322,7 @@ class MainApp(QtCore.QObject):
 
         for idx in range(len(self.mainWindows), len(fileNames)):
             fileName = fileNames[idx]
-            logger.debug(f"Creating new window for file: {fileName}")
+            logger.debug("Creating new window for file: %s", fileName)
             self.addNewMainWindow(cfg=None, fileName=fileName)
 
         if len(self.mainWindows) == 0:
@@ -270,17 +337,33 @@ class MainApp(QtCore.QObject):
             if not self._settingsFile:
                 logger.info("No settings file specified. Not saving persistent state.")
             else:
-                logger.info("Saving settings to: {}".format(self._settingsFile))
+                logger.info("Saving settings to: %s", self._settingsFile)
                 settings = self.marshall()
+
+                # The backup must be made before the settings file is overwritten.
+                if self._backupThread is not None:
+                    self._backupThread.join()
+                    self._backupThread = None
+
+                # Write to a temporary file first and then replace the settings file in one go.
+                # This way a crash while writing never leaves a truncated settings file behind.
+                tmpFile = self._settingsFile + '.tmp'
                 try:
-                    jsonStr = json.dumps(settings, sort_keys=True, indent=4)
-                except Exception as ex:
-                    logger.error("Failed to serialize settings to JSON: {}".format(ex))
-                    logger.error("Settings: ...\n" + pprint.pformat(settings, width=100))
+                    # Stream the JSON to the file instead of building the whole string in memory.
+                    with open(tmpFile, 'w', buffering=SETTINGS_WRITE_BUFFER_SIZE) as settingsFile:
+                        try:
+                            json.dump(settings, settingsFile, sort_keys=True, indent=4)
+                        except Exception as ex:
+                            logger.error("Failed to serialize settings to JSON: %s", ex)
+                            logger.error("Settings: ...\n%s", pprint.pformat(settings, width=100))
+                            raise
+                        settingsFile.flush()
+                        os.fsync(settingsFile.fileno())
+                    os.replace(tmpFile, self._settingsFile)
+                except Exception:
+                    if os.path.exists(tmpFile):
+                        os.remove(tmpFile)
                     raise
-                else:
-                    with open(self._settingsFile, 'w') as settingsFile:
-                        settingsFile.write(jsonStr)
 
         except Exception as ex:
             # Continue, even if saving the settings fails.
@@ -298,7 +381,7 @@ class MainApp(QtCore.QObject):
             has changed.
         """
         if not os.path.exists(self._settingsFile):
-            logger.warning("Settings file does not exist: {}".format(self._settingsFile))
+            logger.warning("Settings file does not exist: %s", self._settingsFile)
 
         try:
             with open(self._settingsFile, 'r') as settingsFile:
@@ -309,8 +392,7 @@ class MainApp(QtCore.QObject):
             else:
                 cfg = {}
         except Exception as ex:
-            logger.error("Error {} while reading settings file: {}"
-                           .format(ex, self._settingsFile))
+            logger.error("Error %s while reading settings file: %s", ex, self._settingsFile)
             raise # in case of a syntax error it's probably best to exit.
 
         self._makeConfigBackup(cfg)  # If the version has changed.
@@ -327,11 +409,23 @@ class MainApp(QtCore.QObject):
             self.saveSettings()
 
 
+    def scheduleRepopulateAllWindowMenus(self):
+        """ Schedules a repopulation of the Window menus of all main windows.
+
+            To be called when a main window is created or removed. The menus are rebuilt once
+            when control returns to the event loop, so that adding or removing several windows in
+            a row results in a single rebuild.
+        """
+        if not self._windowMenusDirty:
+            self._windowMenusDirty = True
+            QtCore.QTimer.singleShot(0, self.repopulateAllWindowMenus)
+
+
+    @Slot()
     def repopulateAllWindowMenus(self):
         """ Repopulates the Window menu of all main windows from scratch.
-
-            To be called when a main window is created or removed.
         """
+        self._windowMenusDirty = False
         for win in self.mainWindows:
             win.repopulateWindowMenu(self.windowActionGroup)
 
@@ -344,7 +438,7 @@ class MainApp(QtCore.QObject):
         self.mainWindows.append(mainWindow)
 
         self.windowActionGroup.addAction(mainWindow.activateWindowAction)
-        self.repopulateAllWindowMenus()
+        self.scheduleRepopulateAllWindowMenus()
 
         if cfg:
             mainWindow.unmarshall(cfg)
@@ -365,7 +459,7 @@ class MainApp(QtCore.QObject):
         logger.debug("removeMainWindow called")
 
         self.windowActionGroup.removeAction(mainWindow.activateWindowAction)
-        self.repopulateAllWindowMenus()
+        self.scheduleRepopulateAllWindowMenus()
 
         self.mainWindows.remove(mainWindow)
 
@@ -375,7 +469,7 @@ class MainApp(QtCore.QObject):
         """
         logger.debug("raiseAllWindows called")
         for mainWindow in self.mainWindows:
-            logger.debug("Raising {}".format(mainWindow._instanceNr))
+            logger.debug("Raising %s", mainWindow.windowNumber)
             mainWindow.raise_()
 
 
@@ -398,6 +492,6 @@ class MainApp(QtCore.QObject):
         """
         logger.info("Starting the event loop...")
         exitCode = self.qApplication.exec_()
-        logger.info("Event loop finished with exit code: {}".format(exitCode))
+        logger.info("Event loop finished with exit code: %s", exitCode)
         return exitCode
 
@@ -1,14 +1,18 @@
 """ Main window functionality
 """
 
-import base64
+import binascii
+import functools
 import logging
 import os.path
+import sys
 
 from PySide6 import QtCore, QtGui, QtWidgets
-from PySide6.QtCore import Qt, QUrl, Slot
+from PySide6.QtCore import Qt, QUrl, Signal, Slot
 from PySide6.QtGui import QAction
 
+from docx.document import Document
+
 from wuw.be.doc import read_document
 from wuw.be.info import DEBUGGING, PROJECT_NAME, VERSION
 from wuw.gui.central import CentralWidget
@@ -25,11 +29,86 @@ logger = logging.getLogger(__name__)
 
 DEFAULT_FILE_DIR = homeDirectory()
 
+# Dock widget area that occupies each corner of the main window.
+_CORNER_MAP = (
+    (Qt.TopLeftCorner, Qt.LeftDockWidgetArea),
+    (Qt.BottomLeftCorner, Qt.LeftDockWidgetArea),
+    (Qt.TopRightCorner, Qt.TopDockWidgetArea),
+    (Qt.BottomRightCorner, Qt.BottomDockWidgetArea),
+)
+
+
+# True if the screen signals have been connected to _clearScreenCenterCache
+_screenSignalsConnected = False
+
+
+def _clearScreenCenterCache(*_args) -> None:
+    """ Clears the cache of _availableScreenCenter. Called when the screen configuration changes.
+    """
+    _availableScreenCenter.cache_clear()
+
+
+@functools.lru_cache(maxsize=1)
+def _availableScreenCenter() -> tuple[int, int]:
+    """ Returns the (x, y) center of the available geometry of the primary screen.
+
+        The result is cached. The cache is cleared when screens are added or removed, or when
+        the primary screen changes.
+    """
+    global _screenSignalsConnected
+
+    qApp = QtWidgets.QApplication.instance()
+    if not _screenSignalsConnected:
+        qApp.screenAdded.connect(_clearScreenCenterCache)
+        qApp.screenRemoved.connect(_clearScreenCenterCache)
+        qApp.primaryScreenChanged.connect(_clearScreenCenterCache)
+        _screenSignalsConnected = True
+
+    center = qApp.primaryScreen().availableGeometry().center()
+    return center.x(), center.y()
+
+
+class _DocumentLoaderSignals(QtCore.QObject):
+    """ Signals of the DocumentLoader. A QRunnable is not a QObject so it can't have signals.
+    """
+    sigLoaded = Signal(str, object)  # file name, document
+    sigFailed = Signal(str, object)  # file name, exception
+
+
+
+class DocumentLoader(QtCore.QRunnable):
+    """ Reads a Word document in a thread of the global thread pool.
+
+        Emits signals.sigLoaded when done, or signals.sigFailed if an exception occurred.
+    """
+    def __init__(self, fileName: str):
+        """ Constructor
+        """
+        super().__init__()
+        self.fileName = fileName
+        self.signals = _DocumentLoaderSignals()
+
+
+    def run(self):
+        """ Reads the document. Is called in the worker thread.
+        """
+        try:
+            document = read_document(self.fileName)
+        except Exception as ex:
+            self.signals.sigFailed.emit(self.fileName, ex)
+        else:
+            self.signals.sigLoaded.emit(self.fileName, document)
+
+
+
 class BaseWindow(QtWidgets.QMainWindow):
     """ Application window base class
     """
     __numInstances = 0
 
+    # Class constant so that event() doesn't need to look it up for every event.
+    _WINDOW_ACTIVATE = QtCore.QEvent.WindowActivate
+
     def __init__(self, mainApplication):
         """ Constructor
         """
@@ -39,12 +118,25 @@ class BaseWindow(QtWidgets.QMainWindow):
 
         self._mainApplication = mainApplication
 
+        # Some menus are populated when they are about to be shown for the first time. Mutators
+        # set their entry to False so that they will be populated again.
+        self._menusBuilt = {}  # menu key -> bool
+        self._dockWidgets = []
+        self._tableHeadersViews = []  # list of (menuTitle, treeView) tuples
+
+        # To skip updateWindowTitle when nothing has changed.
+        self._lastSettingsFile = None
+        self._settingsFileBaseName = ''
+        self._lastTitle = None
+
+        # Geometry and state from the persistent settings. Applied at the first showEvent.
+        self._pendingWinGeom = None
+        self._pendingWinState = None
+
         self.setDockNestingEnabled(False)
 
-        self.setCorner(Qt.TopLeftCorner, Qt.LeftDockWidgetArea)
-        self.setCorner(Qt.BottomLeftCorner, Qt.LeftDockWidgetArea)
-        self.setCorner(Qt.TopRightCorner, Qt.TopDockWidgetArea)
-        self.setCorner(Qt.BottomRightCorner, Qt.BottomDockWidgetArea)
+        for corner, area in _CORNER_MAP:
+            self.setCorner(corner, area)
 
         self.setAttribute(QtCore.Qt.WA_DeleteOnClose)
         self.setUnifiedTitleAndToolBarOnMac(True)
@@ -52,9 +144,8 @@ class BaseWindow(QtWidgets.QMainWindow):
         self.resize(1300, 700)  # Assumes minimal resolution of 1366 x 768
 
         # Move window to the center of the screen
-        desktopRect = QtWidgets.QApplication.primaryScreen().availableGeometry()
-        center = desktopRect.center()
-        self.move(round(center.x() - self.width () * 0.5), round(center.y() - self.height() * 0.5))
+        centerX, centerY = _availableScreenCenter()
+        self.move(round(centerX - self.width () * 0.5), round(centerY - self.height() * 0.5))
 
         self._setupActions()
         self._setupMenus()
@@ -67,16 +158,17 @@ class BaseWindow(QtWidgets.QMainWindow):
         """ Is called before destruction (when closing).
             Can be used to clean-up resources.
         """
-        logger.debug("Finalizing: {}".format(self))
+        logger.debug("Finalizing: %s", self)
 
 
 
     def __addTableHeadersSubMenu(self, menuTitle, treeView):
         """ Adds a sub menu to the View | Table Headers menu with actions to show/hide columns
+
+            The sub menu is created when the Table Headers menu is shown.
         """
-        subMenu = self.tableHeadersMenu.addMenu(menuTitle)
-        for action in treeView.getHeaderContextMenuActions():
-            subMenu.addAction(action)
+        self._tableHeadersViews.append((menuTitle, treeView))
+        self._menusBuilt['tableHeaders'] = False
 
 
     def _setupActions(self):
@@ -89,7 +181,11 @@ class BaseWindow(QtWidgets.QMainWindow):
         self.activateWindowAction = QAction("Window #{}".format(self.windowNumber), self)
         self.activateWindowAction.triggered.connect(self.activateAndRaise)
         self.activateWindowAction.setCheckable(True)
-        #self.addAction(self.activateWindowAction)
+
+        # The Window menus are only populated when shown. Adding the action to its own window, as
+        # an application wide shortcut, makes that the shortcut works from all windows regardless.
+        self.activateWindowAction.setShortcutContext(Qt.ApplicationShortcut)
+        self.addAction(self.activateWindowAction)
 
         if self.windowNumber <= 9:
             self.activateWindowAction.setShortcut(QtGui.QKeySequence(
@@ -120,7 +216,9 @@ class BaseWindow(QtWidgets.QMainWindow):
 
         self.viewMenu.addSeparator()
         self.panelsMenu = self.viewMenu.addMenu("&Panels")
+        self.panelsMenu.aboutToShow.connect(self._populatePanelsMenu)
         self.tableHeadersMenu = self.viewMenu.addMenu("&Table Headers")
+        self.tableHeadersMenu.aboutToShow.connect(self._populateTableHeadersMenu)
 
         self.viewMenu.addSeparator()
 
@@ -133,20 +231,47 @@ class BaseWindow(QtWidgets.QMainWindow):
         menuBar.addSeparator()
         self.helpMenu = menuBar.addMenu("&Help")
 
+        # The Help menu is populated right away. Top-level menus that are empty are not shown in
+        # the native OS-X menu bar, so they never receive an aboutToShow signal.
         self.helpMenu.addSeparator()
 
         # self.helpMenu.addAction(
         #     "Show Log Files...",
         #     lambda: self.openInExternalApp(appLogDirectory()))
 
-        self.helpMenu.addAction(
-            "Show Config Files...",
-            lambda: self.openInExternalApp(appConfigDirectory()))
+        self.helpMenu.addAction("Show Config Files...", self.showConfigFiles)
 
 
         self.helpMenu.addAction('&About...', self.about)
 
 
+    @Slot()
+    def _populatePanelsMenu(self):
+        """ Populates the View | Panels menu if it's not yet up to date.
+        """
+        if self._menusBuilt.get('panels', False):
+            return
+
+        self.panelsMenu.clear()
+        for dockWidget in self._dockWidgets:
+            self.panelsMenu.addAction(dockWidget.toggleViewAction())
+        self._menusBuilt['panels'] = True
+
+
+    @Slot()
+    def _populateTableHeadersMenu(self):
+        """ Populates the View | Table Headers menu if it's not yet up to date.
+        """
+        if self._menusBuilt.get('tableHeaders', False):
+            return
+
+        self.tableHeadersMenu.clear()
+        for menuTitle, treeView in self._tableHeadersViews:
+            subMenu = self.tableHeadersMenu.addMenu(menuTitle)
+            subMenu.addActions(list(treeView.getHeaderContextMenuActions()))
+        self._menusBuilt['tableHeaders'] = True
+
+
     def _setupViews(self):
         """ Creates the UI widgets.
         """
@@ -163,13 +288,14 @@ class BaseWindow(QtWidgets.QMainWindow):
     # Properties #
     ##############
 
-    @property
+    # The window number and application never change, so they are cached after the first access.
+    @functools.cached_property
     def windowNumber(self):
         """ The instance number of this window.
         """
         return self._windowNumber
 
-    @property
+    @functools.cached_property
     def mainApplication(self):
         """ The MainApplication to which this window belongs.
         """
@@ -187,12 +313,21 @@ class BaseWindow(QtWidgets.QMainWindow):
 
     def repopulateWindowMenu(self, actionGroup):
         """ Clear the window menu and fills it with the actions of the actionGroup
+
+            The menu is updated right away, not when it's about to be shown. The native OS-X menu
+            bar doesn't show empty top-level menus, so it might never get an aboutToShow signal.
         """
-        for action in self.windowMenu.actions():
-            self.windowMenu.removeAction(action)
+        self.windowMenu.clear()
+        self.windowMenu.addActions(actionGroup.actions())
+
 
-        for action in actionGroup.actions():
-            self.windowMenu.addAction(action)
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def _dockObjectName(title: str) -> str:
+        """ Returns the (interned) object name of the dock widget with the given title.
+        """
+        # Use dock2 as name to reset at upgrade
+        return sys.intern(f"dock2_{stringToIdentifier(title)}")
 
 
     def dockWidget(self, widget, title, area):
@@ -202,12 +337,12 @@ class BaseWindow(QtWidgets.QMainWindow):
         assert widget.parent() is None, "Widget already has a parent"
 
         dockWidget = QtWidgets.QDockWidget(title, parent=self)
-        # Use dock2 as name to reset at upgrade
-        dockWidget.setObjectName("dock2_" + stringToIdentifier(title)) # Use doc
+        dockWidget.setObjectName(self._dockObjectName(title))
         dockWidget.setWidget(widget)
         self.addDockWidget(area, dockWidget)
 
-        self.panelsMenu.addAction(dockWidget.toggleViewAction())
+        self._dockWidgets.append(dockWidget)
+        self._menusBuilt['panels'] = False
         return dockWidget
 
 
@@ -215,16 +350,30 @@ class BaseWindow(QtWidgets.QMainWindow):
         """ Updates the window title frm the window number, inspector, etc
             Also updates the Window Menu
         """
-        title = "{} #{}".format(PROJECT_NAME, self.windowNumber)
+        settingsFile = self.mainApplication.settingsFile
+        if settingsFile != self._lastSettingsFile:
+            self._lastSettingsFile = settingsFile
+            self._settingsFileBaseName = os.path.basename(settingsFile) if settingsFile else ''
+
+        title = f"{PROJECT_NAME} #{self.windowNumber}"
 
         # Display settings file name in title bar if it's not the default
-        settingsFile = os.path.basename(self.mainApplication.settingsFile)
-        if settingsFile != 'settings.json':
-            title = "{} -- {}".format(title, settingsFile)
+        if self._settingsFileBaseName and self._settingsFileBaseName != 'settings.json':
+            title = f"{title} -- {self._settingsFileBaseName}"
+
+        if title == self._lastTitle:
+            return
+        self._lastTitle = title
 
         self.setWindowTitle(title)
-       
-        self.activateWindowAction.setText("{} window".format('???'))
+        self.activateWindowAction.setText("??? window")
+
+
+    @Slot()
+    def showConfigFiles(self):
+        """ Opens the directory with the config files in the system's file browser.
+        """
+        self.openInExternalApp(appConfigDirectory())
 
 
     def openInWebBrowser(self, url):
@@ -234,7 +383,7 @@ class BaseWindow(QtWidgets.QMainWindow):
             that is used to open that type of file by default.
         """
         try:
-            logger.debug("Opening URL: {}".format(url))
+            logger.debug("Opening URL: %s", url)
             qUrl = QUrl(url)
             QtGui.QDesktopServices.openUrl(qUrl)
         except Exception as ex:
@@ -250,11 +399,11 @@ class BaseWindow(QtWidgets.QMainWindow):
             that is used to open that type of file by default.
         """
         try:
-            logger.debug("Opening URL: {}".format(fileName))
-            if not os.path.exists(fileName):
-                raise OSError("File doesn't exist.")
+            logger.debug("Opening URL: %s", fileName)
+            # No os.path.exists check beforehand; it can block for a long time on network drives.
             url = QUrl.fromLocalFile(fileName)
-            QtGui.QDesktopServices.openUrl(url)
+            if not QtGui.QDesktopServices.openUrl(url):
+                raise OSError("File doesn't exist or no application can open it.")
         except Exception as ex:
             msg = "Unable to open file '{}'. \n\nDetails: {}".format(fileName, ex)
             QtWidgets.QMessageBox.warning(self, "Warning", msg)
@@ -264,9 +413,13 @@ class BaseWindow(QtWidgets.QMainWindow):
     def marshall(self) -> ConfigDict:
         """ Returns a dictionary to save in the persistent settings
         """
+        # If the window hasn't been shown yet, keep the layout that was read from the settings.
+        winGeom = getWidgetGeom(self) if self._pendingWinGeom is None else self._pendingWinGeom
+        winState = getWidgetState(self) if self._pendingWinState is None else self._pendingWinState
+
         layoutCfg = dict(
-            winGeom = base64.b64encode(getWidgetGeom(self)).decode('ascii'),
-            winState = base64.b64encode(getWidgetState(self)).decode('ascii'),
+            winGeom = binascii.b2a_base64(winGeom, newline=False).decode('ascii'),
+            winState = binascii.b2a_base64(winState, newline=False).decode('ascii'),
         )
 
         cfg = dict(
@@ -277,20 +430,34 @@ class BaseWindow(QtWidgets.QMainWindow):
 
     def unmarshall(self, cfg: ConfigDict) -> None:
         """ Initializes itself from a config dict form the persistent settings.
+
+            The geometry and state are restored when the window is shown for the first time.
         """
         layoutCfg = cfg.get('layout', {})
 
         if 'winGeom' in layoutCfg:
-            self.restoreGeometry(base64.b64decode(layoutCfg['winGeom']))
+            self._pendingWinGeom = binascii.a2b_base64(layoutCfg['winGeom'])
         if 'winState' in layoutCfg:
-            self.restoreState(base64.b64decode(layoutCfg['winState']))
+            self._pendingWinState = binascii.a2b_base64(layoutCfg['winState'])
+
+
+    def showEvent(self, event):
+        """ Restores the geometry and state from the persistent settings (once).
+        """
+        if self._pendingWinGeom is not None:
+            self.restoreGeometry(self._pendingWinGeom)
+            self._pendingWinGeom = None
+        if self._pendingWinState is not None:
+            self.restoreState(self._pendingWinState)
+            self._pendingWinState = None
+        super().showEvent(event)
 
 
     @Slot()
     def activateAndRaise(self):
         """ Activates and raises the window.
         """
-        logger.debug("Activate and raising window: {}".format(self.windowNumber))
+        logger.debug("Activate and raising window: %s", self._windowNumber)
         self.activateWindow()
         self.raise_()
 
@@ -298,8 +465,8 @@ class BaseWindow(QtWidgets.QMainWindow):
     def event(self, ev):
         """ Detects the WindowActivate event. Pass all event through to the super class.
         """
-        if ev.type() == QtCore.QEvent.WindowActivate:
-            logger.debug("Window activated: {}".format(self.windowNumber))
+        if ev.type() == self._WINDOW_ACTIVATE:
+            logger.debug("Window activated: %s", self._windowNumber)
             self.activateWindowAction.setChecked(True)
 
         return super().event(ev)
@@ -335,6 +502,7 @@ class MainWindow(BaseWindow):
     def __init__(self, mainApplication):
         """ Constructor
         """
+        self._documentLoader = None  # The DocumentLoader that is currently running (if any)
         super().__init__(mainApplication)
         self._fileDialogDir = DEFAULT_FILE_DIR
 
@@ -352,11 +520,12 @@ class MainWindow(BaseWindow):
         self.openFileAction.triggered.connect(self.openFileWithDialog)
         self.addAction(self.openFileAction)
 
-        self.myTestAction = QAction("My Test", self)
-        self.myTestAction.setToolTip("Ad-hoc test procedure for debugging.")
-        self.myTestAction.setShortcut("Meta+T")
-        self.myTestAction.triggered.connect(self.myTest)
-        self.addAction(self.myTestAction)
+        if DEBUGGING:
+            self.myTestAction = QAction("My Test", self)
+            self.myTestAction.setToolTip("Ad-hoc test procedure for debugging.")
+            self.myTestAction.setShortcut("Meta+T")
+            self.myTestAction.triggered.connect(self.myTest)
+            self.addAction(self.myTestAction)
 
 
     def _setupMenus(self):
@@ -383,6 +552,14 @@ class MainWindow(BaseWindow):
         self.setCentralWidget(self.mainWidget)
 
 
+    def finalize(self):
+        """ Is called before destruction (when closing).
+        """
+        if self._documentLoader is not None:
+            self._documentLoader = None
+            QtWidgets.QApplication.restoreOverrideCursor()
+        super().finalize()
+
 
     def marshall(self) -> ConfigDict:
         """ Returns a dictionary to save in the persistent settings
@@ -411,7 +588,7 @@ class MainWindow(BaseWindow):
 
             If the fileName is None, the user is asked the file via a dialog window.
         """
-        logger.debug(f"Opening file dialog in: {self._fileDialogDir}")
+        logger.debug("Opening file dialog in: %s", self._fileDialogDir)
         fileName, _ = QtWidgets.QFileDialog.getOpenFileName(
             self, "caption", self._fileDialogDir, "Word documents (*.docx)")
 
@@ -423,7 +600,7 @@ class MainWindow(BaseWindow):
         self._fileDialogDir = os.path.dirname(fileName)
 
         # Only add files that were added via the dialog box (not via the command line).
-        #self._mainApplication.addToRecentFiles(fileName)
+        self._mainApplication.addToRecentFiles(fileName)
 
         self.openFile(fileName)
 
@@ -432,12 +609,66 @@ class MainWindow(BaseWindow):
     def openFile(self, fileName: str=None):
         """ Opens a Word document.
 
-            If the fileName is None, the user is asked the file via a dialog window.
+            If the fileName is None, an empty document is shown.
         """
-        logger.info(f"Opening: {fileName}")
+        logger.info("Opening: %s", fileName)
         if fileName is None:
-            document = None
+            self._setLoadedDocument(None)
         else:
-            document = read_document(fileName)
+            self._loadDocumentInBackground(fileName)
+
+
+    def _loadDocumentInBackground(self, fileName: str):
+        """ Reads the document in a thread pool so that the GUI stays responsive.
+
+            The document is shown when loading has finished. A busy cursor is shown meanwhile.
+        """
+        if self._documentLoader is None:
+            QtWidgets.QApplication.setOverrideCursor(Qt.WaitCursor)
+
+        # The previous loader (if any) is replaced so that its results will be ignored.
+        self._documentLoader = DocumentLoader(fileName)
+        self._documentLoader.signals.sigLoaded.connect(self._onDocumentLoaded)
+        self._documentLoader.signals.sigFailed.connect(self._onDocumentLoadFailed)
+        QtCore.QThreadPool.globalInstance().start(self._documentLoader)
+
+
+    def _isCurrentLoader(self, signals: QtCore.QObject) -> bool:
+        """ Returns True if the signals belong to the loader of the last opened file.
+        """
+        return self._documentLoader is not None and signals is self._documentLoader.signals
+
+
+    def _setLoadedDocument(self, document: Document):
+        """ Stops waiting for the document loader (if any) and shows the document.
+        """
+        if self._documentLoader is not None:
+            self._documentLoader = None
+            QtWidgets.QApplication.restoreOverrideCursor()
 
         self.mainWidget.setDocument(document)
+
+
+    @Slot(str, object)
+    def _onDocumentLoaded(self, fileName: str, document: Document):
+        """ Shows the document when it has been read by the document loader.
+        """
+        if not self._isCurrentLoader(self.sender()):
+            logger.debug("Ignoring outdated document: %s", fileName)
+            return
+
+        self._setLoadedDocument(document)
+
+
+    @Slot(str, object)
+    def _onDocumentLoadFailed(self, fileName: str, ex: Exception):
+        """ Reports the error when the document loader could not read the document.
+        """
+        if not self._isCurrentLoader(self.sender()):
+            logger.debug("Ignoring error of outdated document: %s", fileName)
+            return
+
+        self._setLoadedDocument(None)
+        msg = "Unable to open file '{}'. \n\nDetails: {}".format(fileName, ex)
+        logger.error(msg.replace('\n', ' '))
+        QtWidgets.QMessageBox.warning(self, "Warning", msg)
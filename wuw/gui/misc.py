@@ -1,6 +1,6 @@
 """ Miscellaneous Qt routines.
 """
-import os.path
+import os
 import logging
 import sys
 import traceback
@@ -11,6 +11,9 @@ from wuw.be.info import DEBUGGING
 
 logger = logging.getLogger(__name__)
 
+# Contents of the style sheets that have been read, by absolute file name.
+_qssCache: dict[str, str] = {}
+
 
 
 def processEvents():
@@ -29,8 +32,8 @@ def safeSetApplicationQtStyle(styleName):
     if styleName:
         availableStyles = QtWidgets.QStyleFactory.keys()
         if  styleName not in availableStyles:
-            logger.warning("Qt style '{}' is not available on this computer. Use one of: {}"
-                           .format(styleName, availableStyles))
+            logger.warning("Qt style '%s' is not available on this computer. Use one of: %s",
+                           styleName, availableStyles)
         else:
             setApplicationQtStyle(styleName)
 
@@ -39,12 +42,12 @@ def setApplicationQtStyle(styleName):
     """ Sets the Qt style (e.g. to 'fusion')
     """
     qApp = QtWidgets.QApplication.instance()
-    logger.debug("Setting Qt style to: {}".format(styleName))
+    logger.debug("Setting Qt style to: %s", styleName)
     qApp.setStyle(QtWidgets.QStyleFactory.create(styleName))
     if qApp.style().objectName().lower() != styleName.lower():
         logger.warning(
-            "Setting style failed: actual style {!r} is not the specified style {!r}"
-            .format(qApp.style().objectName(), styleName))
+            "Setting style failed: actual style %r is not the specified style %r",
+            qApp.style().objectName(), styleName)
 
 
 def safeSetApplicationStyleSheet(fileName):
@@ -60,19 +63,35 @@ def safeSetApplicationStyleSheet(fileName):
         setApplicationStyleSheet(fileName)
 
 def setApplicationStyleSheet(fileName):
+    """ Reads the style sheet from file and set it as application style sheet.
 
+        The file is only read the first time. Use clearStylesheetCache to read it again.
+    """
     fileName = os.path.abspath(fileName)
-    logger.debug("Reading qss from: {}".format(fileName))
-    try:
-        with open(fileName) as input:
-            qss = input.read()
-    except Exception as ex:
-        logger.warning("Unable to read style sheet from '{}'. Reason: {}".format(fileName, ex))
-        return
+    qss = _qssCache.get(fileName)
+    if qss is None:
+        logger.debug("Reading qss from: %s", fileName)
+        try:
+            # A style sheet is small; read it in one go instead of via the buffered text layer.
+            fd = os.open(fileName, os.O_RDONLY)
+            try:
+                qss = os.read(fd, os.fstat(fd).st_size).decode('utf-8')
+            finally:
+                os.close(fd)
+        except Exception as ex:
+            logger.warning("Unable to read style sheet from '%s'. Reason: %s", fileName, ex)
+            return
+        _qssCache[fileName] = qss
 
     QtWidgets.QApplication.instance().setStyleSheet(qss)
 
 
+def clearStylesheetCache():
+    """ Forgets the style sheets that have been read, e.g. after the files have been edited.
+    """
+    _qssCache.clear()
+
+
 ######################
 # Exception Handling #
 ######################
@@ -109,27 +128,46 @@ class ResizeDetailsMessageBox(QtWidgets.QMessageBox):
 
 
 
-def handleException(exc_type, exc_value, exc_traceback):
+# Message box that handleException reuses, and the (type, message) of the last shown exception.
+_excMsgBox = None
+_lastShownException = None
 
-    traceback.format_exception(exc_type, exc_value, exc_traceback)
 
-    logger.critical("Bug: uncaught {}".format(exc_type.__name__),
+def handleException(exc_type, exc_value, exc_traceback):
+    global _excMsgBox, _lastShownException
+
+    logger.critical("Bug: uncaught %s", exc_type.__name__,
                     exc_info=(exc_type, exc_value, exc_traceback))
     if DEBUGGING:
         logger.info("Quitting application with exit code 1")
         sys.exit(1)
     else:
+        # An exception that is raised while the box is open (exec_ runs a nested event loop)
+        # has been logged. Don't change the text that the user is reading and don't call
+        # exec_ recursively.
+        if _excMsgBox is not None and _excMsgBox.isVisible():
+            return
+
+        # Don't show the same exception again if it is raised repeatedly. It has been logged.
+        excKey = (exc_type, str(exc_value))
+        if excKey == _lastShownException:
+            logger.info("Quitting application with exit code 1")
+            sys.exit(1)
+        _lastShownException = excKey
+
         # Constructing a QApplication in case this hasn't been done yet.
         if not QtWidgets.QApplication.instance():
             _app = QtWidgets.QApplication()
 
-        msgBox = ResizeDetailsMessageBox()
-        msgBox.setText("Bug: uncaught {}".format(exc_type.__name__))
-        msgBox.setInformativeText(str(exc_value))
+        if _excMsgBox is None:
+            _excMsgBox = ResizeDetailsMessageBox()
+            _excMsgBox.setIcon(QtWidgets.QMessageBox.Warning)
+
+        _excMsgBox.setText("Bug: uncaught {}".format(exc_type.__name__))
+        _excMsgBox.setInformativeText(excKey[1])
         lst = traceback.format_exception(exc_type, exc_value, exc_traceback)
-        msgBox.setDetailedText("".join(lst))
-        msgBox.setIcon(QtWidgets.QMessageBox.Warning)
-        msgBox.exec_()
+        _excMsgBox.setDetailedText("".join(lst))
+        _excMsgBox.exec_()
         logger.info("Quitting application with exit code 1")
         sys.exit(1)
 
@@ -141,45 +179,27 @@ def handleException(exc_type, exc_value, exc_traceback):
 
 
 def getWidgetGeom(widget):
-    """ Gets the QWindow or QWidget geometry as a QByteArray.
-
-        Since Qt does not provide this directly we hack this by saving it to the QSettings
-        in a temporary location and then reading it from the QSettings.
+    """ Gets the QWindow or QWidget geometry as bytes.
 
         :param widget: A QWidget that has a saveGeometry() methods
     """
-    settings = QtCore.QSettings()
-    settings.beginGroup('temp_conversion')
-    try:
-        settings.setValue("winGeom", widget.saveGeometry())
-        return bytes(settings.value("winGeom"))
-    finally:
-        settings.endGroup()
+    return widget.saveGeometry().data()
 
 
 def getWidgetState(qWindow):
-    """ Gets the QWindow or QWidget state as a QByteArray.
-
-        Since Qt does not provide this directly we hack this by saving it to the QSettings
-        in a temporary location and then reading it from the QSettings.
+    """ Gets the QWindow or QWidget state as bytes.
 
         :param widget: A QWidget that has a saveState() methods
     """
-    settings = QtCore.QSettings()
-    settings.beginGroup('temp_conversion')
-    try:
-        settings.setValue("winState", qWindow.saveState())
-        return bytes(settings.value("winState"))
-    finally:
-        settings.endGroup()
+    return qWindow.saveState().data()
 
 
 def setWidgetSizePolicy(widget, hor=None, ver=None):
     """ Sets horizontal and/or vertical size policy on a widget
     """
     sizePolicy = widget.sizePolicy()
-    logger.debug("widget {} size policy Befor: {} {}"
-                 .format(widget, sizePolicy.horizontalPolicy(), sizePolicy.verticalPolicy()))
+    logger.debug("widget %s size policy BEFORE: %s %s",
+                 widget, sizePolicy.horizontalPolicy(), sizePolicy.verticalPolicy())
 
     if hor is not None:
         sizePolicy.setHorizontalPolicy(hor)
@@ -190,6 +210,6 @@ def setWidgetSizePolicy(widget, hor=None, ver=None):
     widget.setSizePolicy(sizePolicy)
 
     sizePolicy = widget.sizePolicy()
-    logger.debug("widget {} size policy AFTER: {} {}"
-                 .format(widget, sizePolicy.horizontalPolicy(), sizePolicy.verticalPolicy()))
+    logger.debug("widget %s size policy AFTER: %s %s",
+                 widget, sizePolicy.horizontalPolicy(), sizePolicy.verticalPolicy())
 
@@ -2,6 +2,7 @@
 """
 
 import logging
+import operator
 
 from PySide6 import QtCore, QtWidgets
 from PySide6.QtCore import Qt, Signal
@@ -25,9 +26,59 @@ _ALIGN_STRING = int(Qt.AlignVCenter | Qt.AlignLeft)
 _ALIGN_NUMBER = int(Qt.AlignVCenter | Qt.AlignRight)
 _ALIGN_BOOLEAN = int(Qt.AlignVCenter | Qt.AlignHCenter)
 
+# Item data roles as module constants so that the data methods don't look them up each call.
+_DISPLAY_ROLE = Qt.DisplayRole
+_TOOL_TIP_ROLE = Qt.ToolTipRole
+_TEXT_ALIGNMENT_ROLE = Qt.TextAlignmentRole
+_SORT_ROLE = Qt.UserRole
+
+# Roles for which DocumentTableModel.data() returns something.
+_HANDLED_ROLES = frozenset([_DISPLAY_ROLE, _SORT_ROLE, _TOOL_TIP_ROLE, _TEXT_ALIGNMENT_ROLE])
+
 ALL_ITEMS_STR = "All"
 
 
+def _valueToStr(value, strings: dict) -> str:
+    """ Returns str(value), reusing the string from the strings dict if it was converted before.
+
+        Alignments and indents have only a few distinct values per document, so this saves both
+        the conversions and the memory of many equal strings.
+    """
+    # The type is part of the key because e.g. WD_PARAGRAPH_ALIGNMENT.LEFT == Emu(0)
+    key = (type(value), value)
+    result = strings.get(key)
+    if result is None:
+        result = strings[key] = str(value)
+    return result
+
+
+class _RowSnap:
+    """ The cell texts of one row of the DocumentTableModel.
+
+        The slots are in the order of the columns.
+    """
+    __slots__ = ('text', 'just', 'align', 'first', 'left', 'right')
+
+    def __init__(self, paragraph: Paragraph, strings: dict):
+        """ Constructor. Stores the cell texts of the paragraph.
+
+            :param strings: dict for _valueToStr, shared by all rows of a document.
+        """
+        fmt = paragraph.paragraph_format
+        self.text = paragraph.text
+        # TODO: Is there a difference with paragraph_format.alignment?
+        self.just = _valueToStr(paragraph.alignment, strings)
+        self.align = _valueToStr(fmt.alignment, strings)
+        self.first = _valueToStr(fmt.first_line_indent, strings)
+        self.left = _valueToStr(fmt.left_indent, strings)
+        self.right = _valueToStr(fmt.right_indent, strings)
+
+# Gets the cell text of a row snapshot by column number
+_FIELD_GETTERS = tuple(operator.attrgetter(name) for name in _RowSnap.__slots__)
+
+RESIZE_CONTENTS_PRECISION = 50  # Max rows to inspect when resizing a column to its contents
+
+
 
 class DocumentTableModel(QtCore.QAbstractTableModel):
     """ A table model that maps the document to a table.
@@ -37,13 +88,17 @@ class DocumentTableModel(QtCore.QAbstractTableModel):
 
     HEADER_TOOL_TIPS = HEADERS
 
+    _COL_COUNT = len(HEADERS)
+
     (COL_NAME, COL_JUSTIFICATION, COL_ALIGNMENT,
      COL_1ST_LINE_INDENT, COL_LEFT_INDENT, COL_RIGHT_INDENT) = range(len(HEADERS))
 
     DEFAULT_WIDTHS = [400, _HW_STR, _HW_STR,
                       _HW_INT, _HW_INT, _HW_INT]
 
-    SORT_ROLE = Qt.UserRole
+    SORT_ROLE = _SORT_ROLE
+
+    FETCH_SIZE = 500  # Number of rows that are added to the table at a time (see fetchMore)
 
     def __init__(self, document: Document=None, **kwargs):
         """ Constructor
@@ -58,6 +113,16 @@ class DocumentTableModel(QtCore.QAbstractTableModel):
         assert len(self.HEADERS) == len(self.HEADER_TOOL_TIPS), "sanity check failed."
 
         self._document = createDocument() if document is None else document
+        # Python-docx builds a new list of paragraphs on each access, so we keep it.
+        self._paragraphs = self._document.paragraphs
+        self._numParagraphs = len(self._paragraphs)
+        self._numRowsFetched = min(self.FETCH_SIZE, self._numParagraphs)
+
+        # Python-docx parses the XML on each attribute access, so the cell texts are computed
+        # once, when the rows are fetched. The paragraphs are only used when a row is selected.
+        self._valueStrings = {}  # Strings of the alignment and indent values (see _valueToStr)
+        self._rows = [_RowSnap(paragraph, self._valueStrings)
+                      for paragraph in self._paragraphs[:self._numRowsFetched]]
 
         # Check mark for boolean columns
         #   ✓ Check mark Unicode: U+2713
@@ -75,63 +140,125 @@ class DocumentTableModel(QtCore.QAbstractTableModel):
     def document(self, doc: Document) -> None:
         """ Sets the document as data in the model
 
-            Resets the model.
+            The model is not reset, see setDocument.
         """
-        self.beginResetModel()
-        try:
-            self._document = createDocument() if doc is None else doc
-        finally:
-            self.endResetModel()
+        self.setDocument(doc)
+
+
+    def setDocument(self, doc: Document) -> None:
+        """ Sets the document as data in the model
+
+            Instead of resetting the model, the rows that are no longer needed are removed, or
+            the missing rows are inserted, and the remaining rows are marked as changed. This
+            way the attached views keep their state (e.g. header sizes and scroll position).
+
+            Note that a current index that is in one of the remaining rows is kept. Since the
+            index itself doesn't change, no currentChanged signal is emitted, even though the
+            row now shows a paragraph of the new document.
+        """
+        document = createDocument() if doc is None else doc
+        paragraphs = document.paragraphs
+        numParagraphs = len(paragraphs)
+
+        # The first rows are fetched right away, like in the constructor.
+        oldNumRows = self._numRowsFetched
+        newNumRows = min(self.FETCH_SIZE, numParagraphs)
+        valueStrings = {}
+        newRows = [_RowSnap(paragraph, valueStrings) for paragraph in paragraphs[:newNumRows]]
+
+        def _update():
+            self._document = document
+            self._paragraphs = paragraphs
+            self._numParagraphs = numParagraphs
+            self._numRowsFetched = newNumRows
+            self._valueStrings = valueStrings
+            self._rows = newRows
+
+        root = QtCore.QModelIndex()
+        if newNumRows < oldNumRows:
+            self.beginRemoveRows(root, newNumRows, oldNumRows - 1)
+            try:
+                _update()
+            finally:
+                self.endRemoveRows()
+        elif newNumRows > oldNumRows:
+            self.beginInsertRows(root, oldNumRows, newNumRows - 1)
+            try:
+                _update()
+            finally:
+                self.endInsertRows()
+        else:
+            _update()
+
+        # Rows that existed before the update now contain the data of the new document.
+        numChanged = min(oldNumRows, newNumRows)
+        if numChanged > 0:
+            self.dataChanged.emit(self.index(0, 0), self.index(numChanged - 1, self._COL_COUNT - 1))
 
 
     @property
     def paragraphs(self):
         """ Returns the paragraphs of the underlying document
         """
-        return self._document.paragraphs
+        return self._paragraphs
 
 
 
     def rowCount(self, _parent=None):
         """ Returns the number of rows.
+
+            Only the rows that have been fetched so far are counted.
         """
-        return len(self.paragraphs)
+        return self._numRowsFetched
 
 
-    def columnCount(self, _parent=None):
-        """ Returns the number of columns.
+    def canFetchMore(self, parent):
+        """ Returns True if there are paragraphs that are not yet in the table.
         """
-        return len(self.HEADERS)
+        if parent.isValid():
+            return False
+        return self._numRowsFetched < self._numParagraphs
 
 
-    def _posFromIndex(self, index):
-        """ Returns the (row, col) given the index
+    def fetchMore(self, parent):
+        """ Adds the next FETCH_SIZE paragraphs to the table.
 
-            Returns None if the index is invalid or row or column are negative or larger than the
-            number of rows/cols
+            The view calls this when it needs more rows, e.g. when the user scrolls to the end.
+            This way large documents are shown without first processing all paragraphs.
         """
-        if not index.isValid():
-            return None
+        if parent.isValid():
+            return
 
-        row, col = index.row(), index.column()
+        numRemaining = self._numParagraphs - self._numRowsFetched
+        numToFetch = min(self.FETCH_SIZE, numRemaining)
+        if numToFetch <= 0:
+            return
 
-        if col < 0 or col >= self.columnCount():
-            return None
+        start, stop = self._numRowsFetched, self._numRowsFetched + numToFetch
+        newRows = [_RowSnap(paragraph, self._valueStrings)
+                   for paragraph in self._paragraphs[start:stop]]
 
-        if row < 0 or row >= self.rowCount():
-            return None
+        self.beginInsertRows(parent, start, stop - 1)
+        try:
+            self._rows.extend(newRows)
+            self._numRowsFetched = stop
+        finally:
+            self.endInsertRows()
 
-        return row, col
+
+    def columnCount(self, _parent=None):
+        """ Returns the number of columns.
+        """
+        return self._COL_COUNT
 
 
     def flags(self, index):
         """ Returns the item flags for the given index
         """
-        pos = self._posFromIndex(index)
-        if pos is None:
+        # An invalid index has row and column -1, so it is filtered out by the bounds check.
+        row, col = index.row(), index.column()
+        if row < 0 or row >= self._numRowsFetched or col < 0 or col >= self._COL_COUNT:
             return None
-        else:
-            row, col = pos
 
         result = Qt.ItemIsEnabled | Qt.ItemIsSelectable
 
@@ -150,40 +277,26 @@ class DocumentTableModel(QtCore.QAbstractTableModel):
             return bool(value) # convert to bool just in case
 
 
-    def data(self, index, role=Qt.DisplayRole):
+    def data(self, index, role=Qt.DisplayRole, _align=_ALIGN_STRING):
         """ Returns the data stored under the given role for the item referred to by the index.
+
+            The _align parameter binds the text alignment as a local; callers should not pass it.
         """
-        pos = self._posFromIndex(index)
-        if pos is None:
+        # This is called for every visible cell and role. Most roles are not used by this model,
+        # so check the role first. Then check the index inline.
+        if role not in _HANDLED_ROLES:
             return None
-        else:
-            row, col = pos
-
-        match role:
-            case Qt.DisplayRole | self.SORT_ROLE | Qt.ToolTipRole:
-                paragraph = self.paragraphs[row]
-
-                match col:
-                    case self.COL_NAME:
-                        return paragraph.text
-                    case self.COL_JUSTIFICATION:
-                        # TODO: Is there a difference with paragraph_format.alignment?
-                        return str(paragraph.alignment)
-                    case self.COL_ALIGNMENT:
-                        return str(paragraph.paragraph_format.alignment)
-                    case self.COL_1ST_LINE_INDENT:
-                        return str(paragraph.paragraph_format.first_line_indent)
-                    case self.COL_LEFT_INDENT:
-                        return str(paragraph.paragraph_format.left_indent)
-                    case self.COL_RIGHT_INDENT:
-                        return str(paragraph.paragraph_format.right_indent)
-                    case _ :
-                        raise AssertionError("Unexpected column: {}".format(col))
-
-            case Qt.TextAlignmentRole:
-                return _ALIGN_STRING
-
-        return None
+
+        # An invalid index has row and column -1, so it is filtered out by the bounds check.
+        row, col = index.row(), index.column()
+        if row < 0 or row >= self._numRowsFetched or col < 0 or col >= self._COL_COUNT:
+            return None
+
+        if role == _TEXT_ALIGNMENT_ROLE:
+            return _align  # All columns are aligned as strings
+
+        # Display, sort and tool tip role
+        return _FIELD_GETTERS[col](self._rows[row])
 
 
     def headerData(self, section, orientation, role=Qt.DisplayRole):
@@ -192,17 +305,14 @@ class DocumentTableModel(QtCore.QAbstractTableModel):
             :param section: row or column number, depending on orientation
             :param orientation: Qt.Horizontal or Qt.Vertical
         """
-        if role not in (Qt.DisplayRole, Qt.ToolTipRole):
+        if role != _DISPLAY_ROLE and role != _TOOL_TIP_ROLE:
             return None
 
         if orientation == Qt.Horizontal:
-            match role:
-                case Qt.DisplayRole:
-                    return self.HEADERS[section]
-                case Qt.ToolTipRole: # doesn't seem to work (tried only on OS-X)
-                    return self.HEADER_TOOL_TIPS[section]
-                case _:
-                    assert False, "Unexpected role: {}".format(role)
+            if role == _DISPLAY_ROLE:
+                return self.HEADERS[section]
+            else: # Tool tip role. Doesn't seem to work (tried only on OS-X)
+                return self.HEADER_TOOL_TIPS[section]
         else:
             return str(section)
 
@@ -247,24 +357,28 @@ class DocumentTableViewer(ToggleColumnTableView):
         verHeader.setSectionResizeMode(QtWidgets.QHeaderView.ResizeMode.Fixed)
 
         horHeader = self.horizontalHeader()
+        # Limit the number of rows that are inspected when a column is sized to its contents.
+        horHeader.setResizeContentsPrecision(RESIZE_CONTENTS_PRECISION)
         horHeader.setSectionsMovable(True)
         horHeader.setSectionResizeMode(QtWidgets.QHeaderView.ResizeMode.Interactive)
         # This unfortunately does not work intuitively when resizing headers.
         #horHeader.setSectionResizeMode(0, QtWidgets.QHeaderView.ResizeMode.Stretch)
         horHeader.setStretchLastSection(False)
 
-        for col, width in enumerate(DocumentTableModel.DEFAULT_WIDTHS):
-            horHeader.resizeSection(col, width)
-
-        # Make the 'name' color wider because of the legend bar.
-        horHeader.resizeSection(
-            DocumentTableModel.COL_NAME,
-            DocumentTableModel.DEFAULT_WIDTHS[DocumentTableModel.COL_NAME])
+        # Disable updates so that the header is laid out once instead of after each section.
+        horHeader.setUpdatesEnabled(False)
+        self.setUpdatesEnabled(False)
+        try:
+            for col, width in enumerate(DocumentTableModel.DEFAULT_WIDTHS):
+                horHeader.resizeSection(col, width)
+        finally:
+            horHeader.setUpdatesEnabled(True)
+            self.setUpdatesEnabled(True)
 
         headerNames = DocumentTableModel.HEADERS
-        enabled = dict((name, True) for name in headerNames)
+        enabled = dict.fromkeys(headerNames, True)
         enabled[headerNames[DocumentTableModel.COL_NAME]] = False # Cannot be unchecked
-        checked = dict((name, True) for name in headerNames)
+        checked = dict.fromkeys(headerNames, True)
         self.addHeaderContextMenu(checked=checked, enabled=enabled, checkable={})
 
         self.setContextMenuPolicy(Qt.DefaultContextMenu) # will call contextMenuEvent
@@ -283,9 +397,9 @@ class DocumentTableViewer(ToggleColumnTableView):
             assert curIdx.isValid(), "Current index not valid"
 
             row = curIdx.row()
-            paragraph = self._sourceModel.document.paragraphs[row]
+            paragraph = self._sourceModel.paragraphs[row]
 
-        logger.debug("Emitting sigParagraphHighlighted: {}".format(paragraph))
+        logger.debug("Emitting sigParagraphHighlighted: %s", paragraph)
         self.sigParagraphHighlighted.emit(paragraph)
 
 
@@ -301,7 +415,7 @@ class DocumentTableViewer(ToggleColumnTableView):
         """ Scroll to the currently selected color map.
         """
         curIdx = self.currentIndex()
-        logger.debug("scrollToCurrent: {} (isValid)".format(curIdx, curIdx.isValid()))
+        logger.debug("scrollToCurrent: %s (isValid: %s)", curIdx, curIdx.isValid())
         if curIdx.isValid():
             self.scrollTo(self.currentIndex())
 
@@ -8,17 +8,21 @@
 """ Defines ToggleColumnMixIn class
 """
 
-import base64
+import binascii
 import logging
 
 from PySide6 import QtWidgets
-from PySide6.QtCore import Qt
+from PySide6.QtCore import Qt, Slot
 from PySide6.QtGui import QAction, QActionGroup
 
 from wuw.gui.misc import getWidgetState
 
 logger = logging.getLogger(__name__)
 
+_HORIZONTAL = Qt.Horizontal
+_DISPLAY_ROLE = Qt.DisplayRole
+_ACTIONS_CONTEXT_MENU = Qt.ActionsContextMenu
+
 # Qt classes have many ancestors
 #pylint: disable=too-many-ancestors
 
@@ -33,6 +37,8 @@ class ToggleColumnMixIn(object):
 
         Has functionality for reading/writing from persitent settings.
     """
+    # Class-level default, so that the mixin needs no constructor. Set by addHeaderContextMenu.
+    toggleColumnActionsGroup = None
 
     def addHeaderContextMenu(self, checked = None, checkable = None, enabled = None):
         """ Adds the context menu from using header information
@@ -47,50 +53,73 @@ class ToggleColumnMixIn(object):
             enabled can be a header_name -> boolean dictionary. If given, header actions
             with the key name will get the enabled value from the dictionary. (Default True)
         """
-        logger.debug(f"Calling addHeaderContextMenu of {self}", stack_info=False)
+        logger.debug("Calling addHeaderContextMenu of %s", self, stack_info=False)
 
         checked = checked if checked is not None else {}
         checkable = checkable if checkable is not None else {}
         enabled = enabled if enabled is not None else {}
 
         horizontal_header = self.horizontalHeader()
-        horizontal_header.setContextMenuPolicy(Qt.ActionsContextMenu)
+        horizontal_header.setContextMenuPolicy(_ACTIONS_CONTEXT_MENU)
+
+        assert self.toggleColumnActionsGroup is None, "Action group already defined."
+        group = self.toggleColumnActionsGroup = QActionGroup(self)
+        group.setExclusive(False)
+        group.triggered.connect(self._onToggleColumnAction)
+
+        # Qt builds a new list each time actions() is called, so keep the actions for lookups.
+        self._actionsByIndex = []
+        self._actionsByName = {}
 
-        assert not hasattr(self, "toggleColumnActionsGroup"), "Action group already defined."
-        self.toggleColumnActionsGroup = QActionGroup(self)
-        self.toggleColumnActionsGroup.setExclusive(False)
-        #self.__toggle_functions = []  # for keeping references
+        # Bind the methods that are called for each column to locals.
+        headerData = self.model().headerData
+        addAction = horizontal_header.addAction
+        isSectionHidden = horizontal_header.isSectionHidden
+        setSectionHidden = horizontal_header.setSectionHidden
 
-        for col in range(horizontal_header.count()):
-            column_label = self.model().headerData(col, Qt.Horizontal, Qt.DisplayRole)
-            #logger.debug("Adding: col {}: {}".format(col, column_label))
+        column_labels = [headerData(col, _HORIZONTAL, _DISPLAY_ROLE)
+                         for col in range(horizontal_header.count())]
+
+        for col, column_label in enumerate(column_labels):
+            #logger.debug("Adding: col %s: %s", col, column_label)
+            is_enabled = enabled.get(column_label, True)
             action = QAction(str(column_label),
-                             self.toggleColumnActionsGroup,
+                             group,
                              checkable = checkable.get(column_label, True),
-                             enabled = enabled.get(column_label, True),
-                             toolTip = "Shows or hides the {} column".format(column_label))
-            func = self.__makeShowColumnFunction(col)
-            #self.__toggle_functions.append(func) # keep reference
-            horizontal_header.addAction(action)
-            is_checked = checked.get(column_label, not horizontal_header.isSectionHidden(col))
-            logger.debug(f"    CHECKED  {column_label:15s}: {is_checked}")
-            horizontal_header.setSectionHidden(col, not is_checked)
+                             enabled = is_enabled)
+            if is_enabled:  # Disabled actions can't show or hide their column
+                action.setToolTip(f"Shows or hides the {column_label} column")
+            action.setData(col)
+            addAction(action)
+            self._actionsByIndex.append(action)
+            self._actionsByName[str(column_label)] = action
+            is_checked = checked.get(column_label, not isSectionHidden(col))
+            logger.debug("    CHECKED  %-15s: %s", column_label, is_checked)
+            setSectionHidden(col, not is_checked)
             action.setChecked(is_checked)
-            action.toggled.connect(func)
 
 
-    def __makeShowColumnFunction(self, column_idx):
-        """ Creates a function that shows or hides a column."""
-        show_column = lambda checked: self.setColumnHidden(column_idx, not checked)
-        return show_column
+    @Slot(QAction)
+    def _onToggleColumnAction(self, action: QAction) -> None:
+        """ Shows or hides the column of an action that was triggered by the user.
+
+            The column number is stored in the data of the action.
+        """
+        self.setColumnHidden(action.data(), not action.isChecked())
 
 
     def showHeaderSection(self, sectionNr: int, show: bool) -> None:
         """ Shows/hides the column of the table with section number sectioNr
         """
-        # Use actios so that the menu is updated as well.
-        action = self.toggleColumnActionsGroup.actions()[sectionNr]
-        action.setChecked(show)
+        # Update the action as well so that the menu stays in sync.
+        self._actionsByIndex[sectionNr].setChecked(show)
+        self.setColumnHidden(sectionNr, not show)
+
+
+    def showHeaderByName(self, name: str, show: bool) -> None:
+        """ Shows/hides the column of the table with the given header name
+        """
+        self.showHeaderSection(self._actionsByName[name].data(), show)
 
 
     def getHeaderContextMenuActions(self):
@@ -106,34 +135,36 @@ class ToggleColumnMixIn(object):
                 menuTitle: Menu title. If None, the panel title will be used.
         """
         menu = QtWidgets.QMenu(menuTitle, parent=self)
-        for action in self.getHeaderContextMenuActions():
-            menu.addAction(action)
+        menu.addActions(self.getHeaderContextMenuActions())
         return menu
 
 
     def marshall(self) -> str:
         """ Returns an ascii string with the base64 encoded tree header state.
         """
-        return base64.b64encode(getWidgetState(self.horizontalHeader())).decode('ascii')
+        headerBytes = getWidgetState(self.horizontalHeader())
+        return binascii.b2a_base64(headerBytes, newline=False).decode('ascii')
 
 
     def unmarshall(self, dataStr: str) -> None:
         """ Initializes itself from a config dict form the persistent settings.
         """
         if dataStr is None:
-            logger.debug("Tree headers state empty, so not restored: {}".format(self))
+            logger.debug("Tree headers state empty, so not restored: %s", self)
             return
 
-        headerBytes = base64.b64decode(dataStr)
+        headerBytes = binascii.a2b_base64(dataStr)
         horizontal_header = self.horizontalHeader()
         header_restored = horizontal_header.restoreState(headerBytes)
         if not header_restored:
-            logger.warning("Tree headers state not restored: {}".format(self))
+            logger.warning("Tree headers state not restored: %s", self)
 
         # update actions so context menus are (un)checked properly
-        for col, action in enumerate(horizontal_header.actions()):
-            isChecked = not horizontal_header.isSectionHidden(col)
-            action.setChecked(isChecked)
+        actions = horizontal_header.actions()
+        isSectionHidden = horizontal_header.isSectionHidden
+        hidden = [isSectionHidden(col) for col in range(len(actions))]
+        for action, isHidden in zip(actions, hidden):
+            action.setChecked(not isHidden)
 
 
 class ToggleColumnTableWidget(QtWidgets.QTableWidget, ToggleColumnMixIn):
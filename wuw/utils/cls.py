@@ -8,7 +8,7 @@ logger = logging.getLogger(__name__)
 def class_name(obj):
     """ Returns human-readable class name of the object ``obj``.
     """
-    return obj.__class__.__name__
+    return type(obj).__name__
 
 
 def check_is_sub_class(cls, class_info, allow_none=False):
@@ -21,7 +21,7 @@ def check_is_sub_class(cls, class_info, allow_none=False):
 def check_type(obj, class_info, allow_none=False):
     """ Raises TypeError if obj is not an instance of class_info
     """
-    logger.debug(f"check_type: {obj}, class_info {class_info}")
+    logger.debug("check_type: %s, class_info %s", obj, class_info)
     if not isinstance(obj, class_info) and not (allow_none and obj is None):
         raise TypeError("Unexpected type {}, was expecting {}".format(type(obj), class_info))
 
@@ -23,10 +23,27 @@ import os
 import os.path
 import platform
 
+from pathlib import Path
+
 from wuw.be.info import ORGANIZATION_NAME, SCRIPT_NAME
 
 logger  = logging.getLogger(__name__)
 
+# The directory functions without arguments only depend on the environment of the process, which
+# doesn't change while the program runs. Their results are therefore computed once, at import
+# time, by _invalidate().
+_HOME = None
+_BASE_CONFIG = None
+_BASE_CONFIG_ERROR = None  # Error message if the base config location is unknown (e.g. unknown OS)
+_APP_CONFIG_DIR = None
+_BASE_LOCAL = None
+_BASE_LOCAL_ERROR = None  # Error message if the base local data location is unknown
+_APP_LOCAL_DIR = None
+_APP_LOG_DIR = None
+_PROGRAM_DIR = None
+_RESOURCE_DIR = None
+_ICONS_DIR = None
+
 
 def normRealPath(path: str) -> str:
     """ Returns the normalized real path.
@@ -40,12 +57,24 @@ def normRealPath(path: str) -> str:
         return path
 
 
+def normAbsPath(path: str) -> str:
+    """ Returns the normalized absolute path.
+
+        Unlike os.path.abspath, the current working directory is only looked up for relative paths.
+    """
+    return os.path.normpath(path if os.path.isabs(path) else os.path.abspath(path))
+
+
 def ensureDirectoryExists(dirName: str) -> None:
     """ Creates a directory if it doesn't yet exist.
     """
-    if not os.path.exists(dirName):
-        logger.info("Creating directory: {}".format(normRealPath(dirName)))
+    try:
         os.makedirs(dirName)
+    except FileExistsError:
+        if os.path.isdir(dirName):
+            return
+        raise
+    logger.info("Created directory: %s", normRealPath(dirName))
 
 
 def ensureFileExists(pathName: str) -> str:
@@ -61,13 +90,16 @@ def ensureFileExists(pathName: str) -> str:
     dirName, fileName = os.path.split(pathName)
     ensureDirectoryExists(dirName)
 
-    if not os.path.exists(pathName):
-        logger.info("Creating empty file: {}".format(pathName))
-        with open(pathName, 'w') as f:
-            f.write('')
+    # O_EXCL makes creating the file atomic. An existing file is never truncated.
+    try:
+        fd = os.open(pathName, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o666)
+    except FileExistsError:
+        # Check that it is not a directory.
+        assert os.path.isfile(pathName), "File is a directory: {!r}".format(pathName)
+    else:
+        os.close(fd)
+        logger.info("Created empty file: %s", pathName)
 
-    # Check file exists and is not a directory.
-    assert os.path.isfile(pathName), "File does not exist or is a directory: {!r}".format(pathName)
     return pathName
 
 
@@ -76,7 +108,7 @@ def homeDirectory() -> str:
 
         See: https://stackoverflow.com/a/4028943/625350
     """
-    return os.path.expanduser("~")
+    return _HOME
 
 
 ################
@@ -89,15 +121,23 @@ def baseConfigLocation() -> str:
 
         See the module doc string at the top for details.
     """
+    if _BASE_CONFIG_ERROR:
+        raise AssertionError(_BASE_CONFIG_ERROR)
+    return _BASE_CONFIG
+
+
+def _computeBaseConfigLocation() -> str:
+    """ Computes the result of baseConfigLocation.
+    """
     # Same as QtCore.QStandardPaths.AppConfigLocation, but without having to import Qt
     sysName = platform.system()
 
     if sysName == "Darwin":
-        configDir = os.path.join(homeDirectory(), 'Library', 'Preferences')
+        configDir = os.path.join(_HOME, 'Library', 'Preferences')
     elif sysName == "Linux":
-        configDir = os.path.join(homeDirectory(), '.config')
+        configDir = os.path.join(_HOME, '.config')
     elif sysName == "Windows":
-        configDir = os.environ.get("LOCALAPPDATA", os.path.join(homeDirectory(), 'AppData', 'Local'))
+        configDir = os.environ.get("LOCALAPPDATA", os.path.join(_HOME, 'AppData', 'Local'))
     else:
         raise AssertionError("Unknown Operating System: {}".format(sysName))
 
@@ -110,7 +150,9 @@ def appConfigDirectory() -> str:
 
         The config directory is platform dependent. (See the module doc string at the top).
     """
-    return os.path.join(baseConfigLocation(), ORGANIZATION_NAME, SCRIPT_NAME)
+    if _BASE_CONFIG_ERROR:
+        raise AssertionError(_BASE_CONFIG_ERROR)
+    return _APP_CONFIG_DIR
 
 
 #############
@@ -126,15 +168,23 @@ def baseLocalDataLocation() -> str:
 
         See the module doc string at the top for details.
     """
+    if _BASE_LOCAL_ERROR:
+        raise AssertionError(_BASE_LOCAL_ERROR)
+    return _BASE_LOCAL
+
+
+def _computeBaseLocalDataLocation() -> str:
+    """ Computes the result of baseLocalDataLocation.
+    """
     # Same as QtCore.QStandardPaths.AppConfigLocation, but without having to import Qt
     sysName = platform.system()
 
     if sysName == "Darwin":
-        cfgDir = os.path.join(homeDirectory(), 'Library', 'Application Support')
+        cfgDir = os.path.join(_HOME, 'Library', 'Application Support')
     elif sysName == "Linux":
-        cfgDir = os.path.join(homeDirectory(), '.local', 'share')
+        cfgDir = os.path.join(_HOME, '.local', 'share')
     elif sysName == "Windows":
-        cfgDir = os.environ.get("APPLOCALDATA2", os.path.join(homeDirectory(), 'AppData', 'Local'))
+        cfgDir = os.environ.get("APPLOCALDATA2", os.path.join(_HOME, 'AppData', 'Local'))
     else:
         raise AssertionError("Unknown Operating System: {}".format(sysName))
 
@@ -147,7 +197,9 @@ def appLocalDataDirectory() -> str:
 
         This directory is platform dependent. (See the module doc string at the top).
     """
-    return os.path.join(baseLocalDataLocation(), ORGANIZATION_NAME, SCRIPT_NAME)
+    if _BASE_LOCAL_ERROR:
+        raise AssertionError(_BASE_LOCAL_ERROR)
+    return _APP_LOCAL_DIR
 
 
 
@@ -156,22 +208,63 @@ def appLogDirectory() -> str:
 
         This is the 'logs' subdirectory of the appLocalDataDirectory()
     """
-    return os.path.join(appLocalDataDirectory(), 'logs')
+    if _BASE_LOCAL_ERROR:
+        raise AssertionError(_BASE_LOCAL_ERROR)
+    return _APP_LOG_DIR
 
 
 def program_directory() -> str:
     """ Returns the program directory where this program is installed
     """
-    return os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    return _PROGRAM_DIR
 
 
 def resource_directory() -> str:
     """ Returns directory with resources (images, style sheets, etc)
     """
-    return os.path.join(program_directory(), 'resources/')
+    return _RESOURCE_DIR
 
 
 def icons_directory() -> str:
     """ Returns the icons directory
     """
-    return os.path.join(resource_directory(), 'icons')
+    return _ICONS_DIR
+
+
+def _invalidate() -> None:
+    """ Computes the directory constants. Is called once, when the module is imported.
+
+        Importing must never fail, so errors (e.g. an unknown operating system) are stored and
+        only raised when the directory in question is requested.
+    """
+    global _HOME, _BASE_CONFIG, _BASE_CONFIG_ERROR, _APP_CONFIG_DIR
+    global _BASE_LOCAL, _BASE_LOCAL_ERROR, _APP_LOCAL_DIR, _APP_LOG_DIR
+    global _PROGRAM_DIR, _RESOURCE_DIR, _ICONS_DIR
+
+    _HOME = os.path.expanduser("~")
+
+    try:
+        _BASE_CONFIG = _computeBaseConfigLocation()
+    except AssertionError as ex:
+        _BASE_CONFIG, _BASE_CONFIG_ERROR = None, str(ex)
+        _APP_CONFIG_DIR = None
+    else:
+        _BASE_CONFIG_ERROR = None
+        _APP_CONFIG_DIR = os.path.join(_BASE_CONFIG, ORGANIZATION_NAME, SCRIPT_NAME)
+
+    try:
+        _BASE_LOCAL = _computeBaseLocalDataLocation()
+    except AssertionError as ex:
+        _BASE_LOCAL, _BASE_LOCAL_ERROR = None, str(ex)
+        _APP_LOCAL_DIR = _APP_LOG_DIR = None
+    else:
+        _BASE_LOCAL_ERROR = None
+        _APP_LOCAL_DIR = os.path.join(_BASE_LOCAL, ORGANIZATION_NAME, SCRIPT_NAME)
+        _APP_LOG_DIR = os.path.join(_APP_LOCAL_DIR, 'logs')
+
+    _PROGRAM_DIR = str(Path(__file__).resolve().parent.parent)
+    _RESOURCE_DIR = os.path.join(_PROGRAM_DIR, 'resources')
+    _ICONS_DIR = os.path.join(_RESOURCE_DIR, 'icons')
+
+
+_invalidate()
@@ -1,5 +1,6 @@
 """ Miscellaneous routines.
 """
+import functools
 import logging
 import pprint
 import re
@@ -11,26 +12,39 @@ logger = logging.getLogger(__name__)
 
 ConfigDict: TypeAlias = Dict[str, Any]
 
+# Used in stringToIdentifier
+_WHITE_SPACE_RE = re.compile(r"\s+")
+_NON_IDENTIFIER_RE = re.compile(r"[^A-Za-z0-9_]+")  # white_space_becomes may be upper case
+_HYPHEN_TO_UNDERSCORE = str.maketrans('-', '_')
+# Each white space run, and each single hyphen, is a separator. Used if both become underscores.
+_SEPARATOR_RE = re.compile(r"\s+|-")
 
+# Used in replaceEolChars. A \r\n pair is a single end-of-line.
+_EOL_RE = re.compile(r"\r\n?|\n")
+_EOL_GLYPH = chr(0x21B5)
+
+
+@functools.lru_cache(maxsize=128)
 def stringToIdentifier(s: str, white_space_becomes: str = '_') -> str:
     """ Takes a string and makes it suitable for use as an identifier.
 
         Translates to lower case.
         Replaces white space by the white_space_becomes character (default=underscore).
         Removes and punctuation.
+
+        The results are cached since this is typically called with the same few titles.
     """
-    s = s.lower()
-    s = re.sub(r"\s+", white_space_becomes, s) # replace whitespace with underscores
-    s = re.sub(r"-", "_", s) # replace hyphens with underscores
-    s = re.sub(r"[^A-Za-z0-9_]", "", s) # remove everything that's not a character, a digit or a _
-    return s
+    if white_space_becomes == '_':
+        s = _SEPARATOR_RE.sub('_', s.lower()) # replace whitespace and hyphens with underscores
+    else:
+        s = _WHITE_SPACE_RE.sub(white_space_becomes, s.lower()) # replace whitespace
+        s = s.translate(_HYPHEN_TO_UNDERSCORE) # replace hyphens with underscores
+    return _NON_IDENTIFIER_RE.sub("", s) # remove everything that's not a character, a digit or a _
 
 
 
 def replaceEolChars(attr: str) -> str:
     """ Replace end-of-line characters with unicode glyphs so that all table rows fit on one line.
     """
-    return (attr.replace('\r\n', chr(0x21B5))
-            .replace('\n', chr(0x21B5))
-            .replace('\r', chr(0x21B5)))
+    return _EOL_RE.sub(_EOL_GLYPH, attr)
 